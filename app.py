@@ -11,8 +11,25 @@
 # --- LIBRARY IMPORTS ---
 
 import streamlit as st  # Web interface framework - all UI components come from here
+import gc  # Python's garbage collector (paused while the page is rendered)
 import time  # For time operations (waiting, progress bar animation)
+import threading  # For a lock shared by all sessions (see _pause_gc)
 from datetime import datetime  # For date and time operations
+from concurrent.futures import ThreadPoolExecutor, as_completed  # For running API calls in the background
+from functools import lru_cache  # For memoizing pure helper functions
+from itertools import islice  # For taking items from an iterator in groups
+from PIL import Image  # For reading image headers of stored gallery files
+
+# itertools.batched() exists only in Python 3.12+
+# For older versions we define a small equivalent
+try:
+    from itertools import batched
+except ImportError:
+    def batched(iterable, n):
+        """Yields tuples of n items from iterable (last one may be shorter)."""
+        iterator = iter(iterable)
+        while batch := tuple(islice(iterator, n)):
+            yield batch
 
 # --- IMPORT OUR OWN MODULES ---
 
@@ -21,26 +38,31 @@ from config.settings import (
     APP_TITLE,  # Application title
     APP_ICON,  # Application icon (emoji)
     IMAGE_SIZES,  # Image size options
+    IMAGE_SIZE_NAMES,  # Image size display names
     DEFAULT_STEPS,  # Default step count
     DEFAULT_GUIDANCE,  # Default guidance scale
     MIN_STEPS,  # Minimum step count
     MAX_STEPS,  # Maximum step count
     MIN_GUIDANCE,  # Minimum guidance
     MAX_GUIDANCE,  # Maximum guidance
-    MAX_IMAGES_PER_REQUEST  # Maximum images per single request
+    MAX_IMAGES_PER_REQUEST,  # Maximum images per single request
+    EXPECTED_GENERATION_SECONDS,  # Estimated duration of one generation
+    GALLERY_PAGE_SIZE  # Images per gallery page
 )
 
 # Get style presets
 from config.style_presets import (
     STYLE_PRESETS,  # Style definitions dictionary
     STYLE_NAMES,  # Style names list
-    DEFAULT_STYLE  # Default style
+    DEFAULT_STYLE_INDEX,  # Position of default style in STYLE_NAMES
+    STYLE_SUFFIXES,  # Prompt suffix of each style
+    STYLE_DEFAULT_NEGATIVES  # Negative prompt of each style
 )
 
 # Get helper functions
 from utils.hf_api_handler import (
     generate_image,  # Single image generation function
-    generate_multiple_images,  # Multiple image generation function
+    generate_image_with_retry,  # Image generation with retry on transient errors
     test_api_connection  # API connection test
 )
 
@@ -74,24 +96,37 @@ st.set_page_config(
 # LOAD CUSTOM CSS STYLES
 # ============================================
 
-def load_css():
+@st.cache_data(show_spinner=False)
+def _read_css():
     """
-    Reads assets/style.css file and applies it to the page.
-    We inject CSS using Streamlit's st.markdown() function.
+    Reads assets/style.css file once and caches its content.
+    Streamlit reruns the script on every interaction, so without
+    caching the file would be read from disk every time.
+
+    Returns:
+    - CSS content (str), or empty string if file not found
     """
     try:
-        # Read CSS file
         with open("assets/style.css", "r", encoding="utf-8") as f:
-            css_content = f.read()
-
-        # Inject CSS into page
-        # unsafe_allow_html=True allows HTML/CSS content
-        st.markdown(f"<style>{css_content}</style>", unsafe_allow_html=True)
+            return f.read()
 
     except FileNotFoundError:
         # If CSS file not found, continue silently
         # Application continues to work, just custom styles won't apply
-        pass
+        return ""
+
+
+def load_css():
+    """
+    Applies the cached content of assets/style.css to the page.
+    We inject CSS using Streamlit's st.markdown() function.
+    """
+    css_content = _read_css()
+
+    # Inject CSS into page
+    # unsafe_allow_html=True allows HTML/CSS content
+    if css_content:
+        st.markdown(f"<style>{css_content}</style>", unsafe_allow_html=True)
 
 
 # Load CSS
@@ -114,9 +149,10 @@ def initialize_session_state():
     if "gallery_manager" not in st.session_state:
         st.session_state.gallery_manager = GalleryManager(st.session_state)
 
-    # Last generated image (to show immediately)
-    if "last_generated" not in st.session_state:
-        st.session_state.last_generated = None
+    # Gallery ID of the last generated image (to show immediately)
+    # Only the ID is kept, the image itself is stored by the gallery
+    if "last_generated_id" not in st.session_state:
+        st.session_state.last_generated_id = None
 
     # Generation status (loading state)
     if "generation_in_progress" not in st.session_state:
@@ -135,6 +171,7 @@ initialize_session_state()
 # HELPER FUNCTIONS
 # ============================================
 
+@lru_cache(maxsize=256)
 def enrich_prompt(main_prompt, style_name):
     """
     Enriches user's prompt based on selected style.
@@ -147,18 +184,12 @@ def enrich_prompt(main_prompt, style_name):
     - Enriched prompt string
     """
 
-    # Get selected style's information
-    style = STYLE_PRESETS.get(style_name, {})
-
-    # If style suffix exists, add to prompt
-    prompt_suffix = style.get("prompt_suffix", "")
-
     # Main prompt + style suffix = enriched prompt
-    enriched_prompt = main_prompt + prompt_suffix
-
-    return enriched_prompt
+    # (suffix is empty if style has none)
+    return main_prompt + STYLE_SUFFIXES.get(style_name, "")
 
 
+@lru_cache(maxsize=256)
 def get_negative_prompt(style_name, user_negative=""):
     """
     Combines style's default negative prompt with user's.
@@ -172,16 +203,153 @@ def get_negative_prompt(style_name, user_negative=""):
     """
 
     # Get style's negative prompt
-    style = STYLE_PRESETS.get(style_name, {})
-    style_negative = style.get("negative_prompt", "")
+    style_negative = STYLE_DEFAULT_NEGATIVES.get(style_name, "")
+
+    # Most common case: user didn't enter anything
+    if not user_negative:
+        return style_negative
 
     # Combine both (separated by comma)
-    if user_negative and style_negative:
+    if style_negative:
         return f"{style_negative}, {user_negative}"
-    elif user_negative:
-        return user_negative
-    else:
-        return style_negative
+    return user_negative
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_api_check():
+    """
+    Cached version of test_api_connection().
+
+    Streamlit runs the whole script again on every widget interaction.
+    Without caching, the API check would run on every slider move.
+    With ttl=60, the result is reused for 60 seconds.
+
+    Returns:
+    - (success, message) tuple from test_api_connection()
+    """
+
+    return test_api_connection()
+
+
+def _png_bytes(image_data):
+    """
+    PNG bytes of a gallery image for download buttons.
+
+    The full-size image is already stored on disk as a PNG, so its
+    bytes are read as they are: no decoding, no encoding and nothing
+    kept in server memory between reruns.
+
+    Parameters:
+    - image_data (dict): Gallery image data dictionary
+
+    Returns:
+    - (byte_data, mime_type, extension), same as prepare_for_download()
+    """
+
+    if image_data["path"]:
+        with open(image_data["path"], "rb") as f:
+            return (f.read(), "image/png", "png")
+
+    # Saving to disk had failed, the image is still in memory
+    return prepare_for_download(image_data["image"], file_format="PNG")
+
+
+def _zip_for(gallery_signature, images):
+    """
+    ZIP archive of the gallery, reused until the gallery changes.
+
+    The signature is a tuple of gallery IDs. It only changes when
+    images are added or removed, so the ZIP is rebuilt only then.
+    Only the latest archive is kept, in this session's session_state:
+    an older one is replaced (not piled up), and other sessions
+    never see it.
+
+    Parameters:
+    - gallery_signature (tuple): IDs of the images in the archive
+    - images (list): Image data dictionaries
+
+    Returns:
+    - ZIP file byte data
+    """
+
+    cached = st.session_state.get("gallery_zip")
+    if cached is None or cached[0] != gallery_signature:
+        # Drop the old archive first, so two full ZIPs are never in memory together
+        st.session_state.gallery_zip = None
+        cached = st.session_state.gallery_zip = (gallery_signature, create_zip(images))
+
+    return cached[1]
+
+
+def _image_info(image_data):
+    """
+    get_image_info() for a gallery image.
+
+    Image.open() only reads the file header (size and mode), the pixels
+    are never decoded, so this is cheap enough to run on every rerun
+    and nothing has to be cached between sessions.
+
+    Parameters:
+    - image_data (dict): Gallery image data dictionary
+
+    Returns:
+    - ImageInfo object from get_image_info()
+    """
+
+    if image_data["path"]:
+        with Image.open(image_data["path"]) as image:
+            return get_image_info(image)
+
+    # Saving to disk had failed, the image is still in memory
+    return get_image_info(image_data["image"])
+
+
+def run_with_progress(progress_bar, status_placeholder, func, **kwargs):
+    """
+    Runs a blocking function in a background thread and moves the
+    progress bar while waiting for it to finish.
+
+    Why a Background Thread?
+    The API call blocks until the image is ready. If we ran it directly,
+    the progress bar could not move. Running it in a thread lets us
+    update the bar while the request is still in flight.
+
+    The bar is driven by elapsed time vs. EXPECTED_GENERATION_SECONDS,
+    and stays at 95% until the call really finishes.
+
+    Parameters:
+    - progress_bar: Streamlit progress bar object
+    - status_placeholder: st.empty() placeholder for status messages
+    - func (callable): Blocking function to run (e.g. generate_image)
+    - **kwargs: Arguments passed to func
+
+    Returns:
+    - Whatever func returns
+    """
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(func, **kwargs)
+        start_time = time.time()
+
+        # Poll the future until the call is finished
+        while not future.done():
+            elapsed = time.time() - start_time
+            percent = min(int(elapsed / EXPECTED_GENERATION_SECONDS * 100), 95)
+            progress_bar.progress(percent)
+
+            if percent >= 90:
+                status_placeholder.info("🎨 Final touches...")
+            elif percent >= 60:
+                status_placeholder.info("🎨 Adding details...")
+            elif percent >= 30:
+                status_placeholder.info("🎨 Model is working...")
+
+            time.sleep(0.25)  # Short wait, then check again
+
+        result = future.result()
+
+    progress_bar.progress(100)
+    return result
 
 
 # ============================================
@@ -194,7 +362,8 @@ def create_sidebar():
     All settings and parameters are located here.
 
     Returns:
-    - Dictionary containing all settings selected by user
+    - (stats_container, settings): Statistics placeholder and
+      dictionary containing all settings selected by user
     """
 
     with st.sidebar:
@@ -203,11 +372,21 @@ def create_sidebar():
         st.markdown("---")  # Horizontal line
 
         # --- API STATUS ---
-        api_success, api_message = test_api_connection()
-        if api_success:
-            st.success("✅ API Connection Ready")
+        # Skip the check while generating: the ping would only compete
+        # with the running generation request for the HF rate limit
+        if st.session_state.generation_in_progress:
+            st.info("⏳ API check skipped during generation")
         else:
-            st.error(f"❌ {api_message}")
+            api_success, api_message = _cached_api_check()
+            if api_success:
+                st.success("✅ API Connection Ready")
+            else:
+                st.error(f"❌ {api_message}")
+
+        # Clear the cached result and check again
+        if st.button("🔄 Re-test API", use_container_width=True):
+            _cached_api_check.clear()
+            st.rerun()
 
         st.markdown("---")
 
@@ -217,7 +396,7 @@ def create_sidebar():
         selected_style = st.selectbox(
             "Select style:",
             options=STYLE_NAMES,
-            index=STYLE_NAMES.index(DEFAULT_STYLE),  # Default selected
+            index=DEFAULT_STYLE_INDEX,  # Default selected
             help="Determines which art style the image will be generated in"
         )
 
@@ -232,7 +411,7 @@ def create_sidebar():
 
         selected_size = st.selectbox(
             "Select size:",
-            options=list(IMAGE_SIZES.keys()),
+            options=IMAGE_SIZE_NAMES,
             index=0,  # First option is default
             help="Larger sizes are higher quality but slower to generate"
         )
@@ -297,22 +476,19 @@ def create_sidebar():
 
         gallery = st.session_state.gallery_manager
 
-        col1, col2 = st.columns(2)
-        with col1:
-            st.metric("In Gallery", f"{gallery.gallery_size()} images")
-        with col2:
-            total = st.session_state.get("total_generated", 0)
-            st.metric("Total Generated", f"{total} images")
+        # Placeholder for the numbers, filled later by show_statistics()
+        # This way they are up to date after clearing or generating,
+        # without running the whole script again with st.rerun()
+        stats_container = st.container()
 
         # Clear gallery button
         if gallery.gallery_size() > 0:
             st.markdown("---")
             if st.button("🗑️ Clear Gallery", use_container_width=True):
                 gallery.clear_gallery()
-                st.rerun()  # Refresh page
 
-    # Return all settings as dictionary
-    return {
+    # Return all settings as dictionary (and the statistics placeholder)
+    return stats_container, {
         "style": selected_style,
         "width": width,
         "height": height,
@@ -323,10 +499,172 @@ def create_sidebar():
     }
 
 
+def show_statistics(stats_container):
+    """
+    Fills the sidebar statistics placeholder with gallery numbers.
+    Called after the main content, so new images are already counted.
+
+    Parameters:
+    - stats_container: Container created in create_sidebar()
+    """
+
+    gallery = st.session_state.gallery_manager
+
+    with stats_container:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("In Gallery", f"{gallery.gallery_size()} images")
+        with col2:
+            total = st.session_state.get("total_generated", 0)
+            st.metric("Total Generated", f"{total} images")
+
+
 # ============================================
 # MAIN CONTENT AREA
 # ============================================
 
+def generate_images(settings, main_prompt, negative_prompt):
+    """
+    Generates the requested image(s) and adds them to the gallery.
+    Progress, results and errors are shown where it is called.
+
+    Parameters:
+    - settings (dict): Settings dictionary from sidebar
+    - main_prompt (str): Image description entered by user
+    - negative_prompt (str): Things the user doesn't want in the image
+    """
+
+    # Placeholder for progress bar and status message
+    progress_placeholder = st.empty()
+    status_placeholder = st.empty()
+
+    # Enrich prompt
+    enriched_prompt = enrich_prompt(main_prompt, settings["style"])
+    combined_negative = get_negative_prompt(settings["style"], negative_prompt)
+
+    # Prepare generation parameters
+    parameters = {
+        "size": f"{settings['width']}x{settings['height']}",
+        "steps": settings["num_steps"],
+        "guidance": settings["guidance"]
+    }
+
+    # Single image or multiple images?
+    if settings["image_count"] == 1:
+        # --- SINGLE IMAGE GENERATION ---
+        status_placeholder.info("🎨 Creating image... This may take 10-30 seconds.")
+
+        # Progress bar follows the real API call
+        progress_bar = progress_placeholder.progress(0)
+        success, image, message = run_with_progress(
+            progress_bar,
+            status_placeholder,
+            generate_image,
+            prompt=enriched_prompt,
+            negative_prompt=combined_negative,
+            width=settings["width"],
+            height=settings["height"],
+            num_steps=settings["num_steps"],
+            guidance_scale=settings["guidance"],
+            seed=settings["seed"]
+        )
+
+        # Process result
+        progress_placeholder.empty()
+        status_placeholder.empty()
+
+        if success:
+            st.success(f"✅ {message}")
+
+            # Add to gallery
+            gallery = st.session_state.gallery_manager
+            image_id = gallery.add_image(
+                image=image,
+                prompt=main_prompt,
+                style=settings["style"],
+                parameters=parameters,
+                seed=settings["seed"]
+            )
+
+            # Show image
+            st.session_state.last_generated_id = image_id
+
+        else:
+            st.error(f"❌ {message}")
+
+    else:
+        # --- MULTIPLE IMAGE GENERATION ---
+        count = settings["image_count"]
+        status_placeholder.info(f"🎨 Creating {count} images...")
+
+        # Different seed for each image: base + 0, base + 1, ...
+        base_seed = int(time.time())
+
+        successful_images = []
+        errors = []
+        gallery = st.session_state.gallery_manager
+
+        # One column per image, each is filled as soon as its image arrives
+        # So the first image is visible without waiting for the others
+        preview_columns = st.container().columns(count)
+
+        # Send all requests at the same time
+        # API calls are network-bound, so threads wait in parallel
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            futures = {
+                executor.submit(
+                    generate_image_with_retry,
+                    prompt=enriched_prompt,
+                    negative_prompt=combined_negative,
+                    width=settings["width"],
+                    height=settings["height"],
+                    num_steps=settings["num_steps"],
+                    guidance_scale=settings["guidance"],
+                    seed=base_seed + i
+                ): i
+                for i in range(count)
+            }
+
+            # Handle each result as soon as it arrives
+            for future in as_completed(futures):
+                i = futures[future]
+                success, image, message = future.result()
+
+                if success:
+                    # Add to gallery right away
+                    image_id = gallery.add_image(
+                        image=image,
+                        prompt=main_prompt,
+                        style=settings["style"],
+                        parameters=parameters,
+                        seed=base_seed + i
+                    )
+                    successful_images.append({"id": image_id, "image": image})
+
+                    # Show it right away in its own column
+                    with preview_columns[i]:
+                        st.image(image, use_container_width=True, caption=f"Image {i + 1}")
+                else:
+                    errors.append(f"Image {i + 1}: {message}")
+
+                done = len(successful_images) + len(errors)
+                status_placeholder.info(f"🎨 {done}/{count} images finished...")
+
+        status_placeholder.empty()
+
+        # Result messages
+        if successful_images:
+            st.success(f"✅ {len(successful_images)} images created successfully!")
+            st.session_state.last_generated_id = successful_images[0]["id"]
+
+        if errors:
+            for error in errors:
+                st.warning(error)
+
+    # No st.rerun() needed: new images are already in session state,
+    # and the sections below are rendered in this same run
+
+
 def main_content(settings):
     """
     Creates the main content area of the page.
@@ -381,163 +719,114 @@ def main_content(settings):
             st.warning("⚠️ Please enter an image description!")
             return
 
-        # Generation started
+        # This session's GC pause is lifted while generating: this part
+        # waits for the API (seconds to minutes) and creates the large
+        # image objects, so pausing GC here would only let memory pile up
+        # finally: the flag is reset even if the run is interrupted
+        # (e.g. the user clicks another widget while waiting), otherwise the
+        # Generate button would stay disabled for the rest of the session
         st.session_state.generation_in_progress = True
+        _resume_gc()
+        try:
+            generate_images(settings, main_prompt, negative_prompt)
+        finally:
+            _pause_gc()
+            st.session_state.generation_in_progress = False
 
-        # Placeholder for progress bar and status message
-        progress_placeholder = st.empty()
-        status_placeholder = st.empty()
-
-        # Enrich prompt
-        enriched_prompt = enrich_prompt(main_prompt, settings["style"])
-        combined_negative = get_negative_prompt(settings["style"], negative_prompt)
-
-        # Prepare generation parameters
-        parameters = {
-            "size": f"{settings['width']}x{settings['height']}",
-            "steps": settings["num_steps"],
-            "guidance": settings["guidance"]
-        }
-
-        # Single image or multiple images?
-        if settings["image_count"] == 1:
-            # --- SINGLE IMAGE GENERATION ---
-            status_placeholder.info("🎨 Creating image... This may take 10-30 seconds.")
-
-            # Progress bar animation
-            progress_bar = progress_placeholder.progress(0)
-            for i in range(100):
-                time.sleep(0.1)  # Total ~10 seconds
-                progress_bar.progress(i + 1)
-                if i == 30:
-                    status_placeholder.info("🎨 Model is working...")
-                elif i == 60:
-                    status_placeholder.info("🎨 Adding details...")
-                elif i == 90:
-                    status_placeholder.info("🎨 Final touches...")
-
-            # API call
-            success, image, message = generate_image(
-                prompt=enriched_prompt,
-                negative_prompt=combined_negative,
-                width=settings["width"],
-                height=settings["height"],
-                num_steps=settings["num_steps"],
-                guidance_scale=settings["guidance"],
-                seed=settings["seed"]
-            )
-
-            # Process result
-            progress_placeholder.empty()
-            status_placeholder.empty()
-
-            if success:
-                st.success(f"✅ {message}")
-
-                # Add to gallery
-                gallery = st.session_state.gallery_manager
-                image_id = gallery.add_image(
-                    image=image,
-                    prompt=main_prompt,
-                    style=settings["style"],
-                    parameters=parameters,
-                    seed=settings["seed"]
-                )
+    # --- SHOW LAST GENERATED IMAGE ---
+    last_generated_section()
 
-                # Show image
-                st.session_state.last_generated = image
 
-            else:
-                st.error(f"❌ {message}")
+# ============================================
+# LAST GENERATED IMAGE SECTION
+# ============================================
 
-        else:
-            # --- MULTIPLE IMAGE GENERATION ---
-            status_placeholder.info(f"🎨 Creating {settings['image_count']} images...")
-
-            successful_images, errors = generate_multiple_images(
-                prompt=enriched_prompt,
-                negative_prompt=combined_negative,
-                width=settings["width"],
-                height=settings["height"],
-                num_steps=settings["num_steps"],
-                guidance_scale=settings["guidance"],
-                count=settings["image_count"]
-            )
+@st.fragment
+def last_generated_section():
+    """
+    Shows the most recently generated image with its info
+    and a download button.
 
-            status_placeholder.empty()
+    What is @st.fragment?
+    A fragment is a part of the page that reruns on its own.
+    Interacting with widgets inside it reruns only this function,
+    not the whole script (sidebar, API check, generation area).
+    """
 
-            # Add successful images to gallery
-            gallery = st.session_state.gallery_manager
-            for image_data in successful_images:
-                gallery.add_image(
-                    image=image_data["image"],
-                    prompt=main_prompt,
-                    style=settings["style"],
-                    parameters=parameters,
-                    seed=image_data["seed"]
-                )
+    # Nothing generated yet, or the image was removed from the gallery
+    gallery = st.session_state.gallery_manager
+    image_data = gallery.get_image(st.session_state.last_generated_id)
+    if image_data is None:
+        return
 
-            # Result messages
-            if successful_images:
-                st.success(f"✅ {len(successful_images)} images created successfully!")
-                st.session_state.last_generated = successful_images[0]["image"]
+    st.markdown("---")
+    st.markdown("### 🖼️ Last Generated Image")
 
-            if errors:
-                for error in errors:
-                    st.warning(error)
+    col1, col2 = st.columns([2, 1])
 
-        # Generation finished
-        st.session_state.generation_in_progress = False
-        st.rerun()  # Refresh page (update gallery)
+    with col1:
+        # st.image() can read the stored file directly (no decoding needed)
+        st.image(
+            image_data["path"] or image_data["image"],
+            use_container_width=True,
+            caption="Most recently generated image"
+        )
 
-    # --- SHOW LAST GENERATED IMAGE ---
-    if st.session_state.last_generated is not None:
+    with col2:
+        # Image information
+        info = _image_info(image_data)
+        st.markdown("**📊 Image Info:**")
+        st.write(f"Size: {info['size_text']}")
+        st.write(f"Megapixels: {info['megapixels']} MP")
+        st.write(f"Color Mode: {info['color_mode']}")
+
+        # Download button
         st.markdown("---")
-        st.markdown("### 🖼️ Last Generated Image")
+        download_data, mime_type, extension = _png_bytes(image_data)
 
-        col1, col2 = st.columns([2, 1])
+        file_name = f"ai_image_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
 
-        with col1:
-            st.image(
-                st.session_state.last_generated,
-                use_container_width=True,
-                caption="Most recently generated image"
-            )
-
-        with col2:
-            # Image information
-            info = get_image_info(st.session_state.last_generated)
-            st.markdown("**📊 Image Info:**")
-            st.write(f"Size: {info['size_text']}")
-            st.write(f"Megapixels: {info['megapixels']} MP")
-            st.write(f"Color Mode: {info['color_mode']}")
-
-            # Download button
-            st.markdown("---")
-            download_data, mime_type, extension = prepare_for_download(
-                st.session_state.last_generated,
-                file_format="PNG"
-            )
-
-            file_name = f"ai_image_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
-
-            st.download_button(
-                label="⬇️ Download Image",
-                data=download_data,
-                file_name=file_name,
-                mime=mime_type,
-                use_container_width=True
-            )
+        st.download_button(
+            label="⬇️ Download Image",
+            data=download_data,
+            file_name=file_name,
+            mime=mime_type,
+            use_container_width=True
+        )
 
 
 # ============================================
 # GALLERY SECTION
 # ============================================
 
+def _toggle_selection(image_id):
+    """
+    on_change callback of the gallery "Select" checkboxes.
+
+    The selection is kept in its own session_state entry, not only in
+    the checkbox state: checkboxes of other gallery pages are not drawn,
+    and Streamlit forgets the state of widgets that are not drawn.
+
+    Parameters:
+    - image_id (str): Gallery ID of the image whose checkbox changed
+    """
+
+    # Dictionary keys work as an ordered set: {image_id: True}
+    selected_ids = st.session_state.setdefault("selected_ids", {})
+    if st.session_state[f"sel_{image_id}"]:
+        selected_ids[image_id] = True
+    else:
+        selected_ids.pop(image_id, None)
+
+
+@st.fragment
 def gallery_section():
     """
     Displays all images in the gallery in a grid format.
     Offers preview, info and download options for each image.
+
+    Runs as a fragment (see last_generated_section), so pagination
+    and selection widgets only rerun the gallery, not the whole page.
     """
 
     st.markdown("---")
@@ -547,6 +836,7 @@ def gallery_section():
     all_images = gallery.get_all_images()
 
     if not all_images:
+        st.session_state.pop("gallery_zip", None)  # Release the old archive
         st.info("🔭 Gallery is empty. Create new images above!")
         return
 
@@ -554,7 +844,8 @@ def gallery_section():
     if len(all_images) > 1:
         col1, col2, col3 = st.columns([1, 1, 1])
         with col2:
-            zip_data = create_zip(all_images)
+            gallery_signature = tuple(image_data["id"] for image_data in all_images)
+            zip_data = _zip_for(gallery_signature, all_images)
             st.download_button(
                 label=f"📦 Download All ({len(all_images)} images)",
                 data=zip_data,
@@ -565,50 +856,126 @@ def gallery_section():
 
     st.markdown("---")
 
-    # Columns for grid view
-    # Show 3 images per row
-    rows = [all_images[i:i + 3] for i in range(0, len(all_images), 3)]
+    # --- PAGINATION ---
+    # Only the images of the current page are rendered
+    # This keeps each rerun fast even with a large gallery
+    # -(-a // b) is ceiling division: 13 images / 12 per page = 2 pages
+    max_pages = -(-len(all_images) // GALLERY_PAGE_SIZE)
+
+    # Gallery may have shrunk (images deleted), keep page in range
+    if st.session_state.get("gallery_page", 1) > max_pages:
+        st.session_state.gallery_page = max_pages
+
+    page = 1
+    if max_pages > 1:
+        page = st.number_input(
+            f"Page (1-{max_pages}):",
+            min_value=1,
+            max_value=max_pages,
+            step=1,
+            key="gallery_page"
+        )
+
+    # IDs ticked with the "Select" checkboxes (on any page)
+    selected_ids = st.session_state.setdefault("selected_ids", {})
+
+    # islice() takes a range of items without copying the whole gallery
+    start = (page - 1) * GALLERY_PAGE_SIZE
+    page_images = islice(all_images, start, start + GALLERY_PAGE_SIZE)
 
-    for row in rows:
+    # Columns for grid view
+    # Show 3 images per row, rows are produced one by one (no extra list)
+    for row in batched(page_images, 3):
         cols = st.columns(3)
 
         for idx, image_data in enumerate(row):
             with cols[idx]:
                 # Image card
                 st.image(
-                    image_data["thumbnail"],
+                    image_data["thumb_bytes"],
                     use_container_width=True
                 )
 
                 # Image info
                 st.caption(f"**Style:** {image_data['style']}")
 
-                # Show shortened prompt
-                prompt_short = image_data["prompt"][:50]
-                if len(image_data["prompt"]) > 50:
-                    prompt_short += "..."
-                st.caption(f"*{prompt_short}*")
+                # Show shortened prompt (prepared when image was added)
+                st.caption(f"*{image_data['prompt_short']}*")
 
                 # Creation time
-                time_str = image_data["created_at"].strftime("%H:%M:%S")
-                st.caption(f"🕐 {time_str}")
-
-                # Download button
-                download_data, mime_type, extension = prepare_for_download(
-                    image_data["image"],
-                    file_format="PNG"
+                st.caption(f"🕐 {image_data['created_at_text']}")
+
+                # Selection checkbox (for "Download Selected" below)
+                # value= restores the tick when coming back from another page
+                st.checkbox(
+                    "Select",
+                    value=image_data["id"] in selected_ids,
+                    key=f"sel_{image_data['id']}",
+                    on_change=_toggle_selection,
+                    args=(image_data["id"],)
                 )
 
+    # --- DOWNLOAD SELECTED ---
+    # Instead of one download button per image (each one needs its
+    # encoded bytes on every rerun), the ZIP is built only on request
+    # Selection of all pages (deleted images simply don't match anymore)
+    selected = [img for img in all_images if img["id"] in selected_ids]
+
+    if selected:
+        st.markdown("---")
+        selection_signature = tuple(img["id"] for img in selected)
+
+        col1, col2, col3 = st.columns([1, 1, 1])
+        with col2:
+            if st.button(f"🗜️ Prepare Selected ({len(selected)} images)", use_container_width=True):
+                st.session_state.selection_zip = (selection_signature, create_zip(selected))
+
+            # Only offer the ZIP if it matches the current selection
+            prepared = st.session_state.get("selection_zip")
+            if prepared and prepared[0] == selection_signature:
                 st.download_button(
-                    label="⬇️ Download",
-                    data=download_data,
-                    file_name=f"{image_data['id']}.{extension}",
-                    mime=mime_type,
-                    key=f"download_{image_data['id']}",
+                    label="⬇️ Download Selected",
+                    data=prepared[1],
+                    file_name=f"ai_images_selected_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+                    mime="application/zip",
                     use_container_width=True
                 )
 
 
+# ============================================
+# GARBAGE COLLECTION PAUSE
+# ============================================
+
+# gc.disable()/gc.enable() switch GC for the whole server process, and
+# every Streamlit session runs its script in its own thread. So the
+# pauses of all sessions are counted: GC is turned off when the first
+# session pauses it and back on only when the last one is done.
+# Otherwise one session finishing would re-enable GC in the middle of
+# another session's run.
+_gc_lock = threading.Lock()
+_gc_pause_count = 0
+
+
+def _pause_gc():
+    """Pauses automatic garbage collection (counted across sessions)."""
+
+    global _gc_pause_count
+    with _gc_lock:
+        _gc_pause_count += 1
+        if _gc_pause_count == 1:
+            gc.disable()
+
+
+def _resume_gc():
+    """Ends one _pause_gc(); GC is enabled again when no pause is left."""
+
+    global _gc_pause_count
+    with _gc_lock:
+        _gc_pause_count -= 1
+        if _gc_pause_count == 0:
+            gc.enable()
+
+
 # ============================================
 # MAIN PROGRAM FLOW
 # ============================================
@@ -619,26 +986,38 @@ def main():
     Brings all components together and runs them.
     """
 
-    # 1. Create sidebar and get settings
-    settings = create_sidebar()
+    # Pause automatic garbage collection while the page is built
+    # A rerun creates many short-lived objects, and with a large gallery
+    # each automatic GC pass has a lot of objects to walk through.
+    # Image generation itself runs with GC on (see main_content)
+    # finally: the pause always ends, even if st.rerun() stops the script
+    _pause_gc()
+    try:
+        # 1. Create sidebar and get settings
+        stats_container, settings = create_sidebar()
 
-    # 2. Create main content area
-    main_content(settings)
+        # 2. Create main content area
+        main_content(settings)
 
-    # 3. Show gallery section
-    gallery_section()
+        # 3. Fill sidebar statistics (after any new images were added)
+        show_statistics(stats_container)
 
-    # 4. Footer
-    st.markdown("---")
-    st.markdown(
-        """
-        <div style='text-align: center; color: #666; padding: 1rem;'>
-            <p>🎨 AI Image Generator | Powered by Hugging Face Stable Diffusion</p>
-            <p>Made with ❤️ using Streamlit</p>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
+        # 4. Show gallery section
+        gallery_section()
+
+        # 5. Footer
+        st.markdown("---")
+        st.markdown(
+            """
+            <div style='text-align: center; color: #666; padding: 1rem;'>
+                <p>🎨 AI Image Generator | Powered by Hugging Face Stable Diffusion</p>
+                <p>Made with ❤️ using Streamlit</p>
+            </div>
+            """,
+            unsafe_allow_html=True
+        )
+    finally:
+        _resume_gc()
 
 
 # ============================================
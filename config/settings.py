@@ -41,6 +41,18 @@ ALTERNATIVE_MODELS = [
     "stabilityai/stable-diffusion-xl-base-1.0",
 ]
 
+# --- RETRY SETTINGS ---
+
+# Transient errors (model loading, rate limit) are retried a few times.
+# Wait time doubles after each failed attempt: 2s, 4s, 8s...
+# This is known as "exponential backoff".
+MAX_RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY = 2  # Seconds to wait before the first retry
+
+# Maximum number of API requests running at the same time.
+# More parallel requests are faster, but may hit the rate limit (429).
+MAX_CONCURRENT_REQUESTS = 4
+
 # --- IMAGE SIZE OPTIONS ---
 
 # Size options to be presented to the user.
@@ -53,6 +65,10 @@ IMAGE_SIZES = {
     "Large Square (1024x1024)": (1024, 1024)  # High quality but slower
 }
 
+# Display names of the sizes, for the dropdown menu.
+# Computed once here instead of on every rerun.
+IMAGE_SIZE_NAMES = list(IMAGE_SIZES.keys())
+
 # --- IMAGE GENERATION PARAMETERS ---
 
 # Inference Steps:
@@ -71,8 +87,14 @@ DEFAULT_GUIDANCE = 7.5
 MIN_GUIDANCE = 1.0
 MAX_GUIDANCE = 20.0
 
+# Expected Generation Time:
+# Rough estimate (in seconds) of how long one image takes.
+# Only used to move the progress bar while waiting for the API.
+EXPECTED_GENERATION_SECONDS = 20
+
 # --- GENERAL APPLICATION SETTINGS ---
 
 APP_TITLE = "AI Image Generator"  # Title to appear in browser tab and on the page
 APP_ICON = "🎨"                    # Emoji/icon to appear in browser tab
 MAX_IMAGES_PER_REQUEST = 4        # User can generate up to 4 variations at once
+GALLERY_PAGE_SIZE = 12            # Images shown per gallery page (4 rows of 3)
@@ -118,4 +118,16 @@ STYLE_NAMES = list(STYLE_PRESETS.keys())
 
 # The style that will be selected when the application opens.
 # We made Photorealistic the default because it's the most preferred style.
-DEFAULT_STYLE = "Photorealistic"
\ No newline at end of file
+DEFAULT_STYLE = "Photorealistic"
+
+# Position of the default style in STYLE_NAMES.
+# Computed once here so the dropdown doesn't search the list on every rerun.
+DEFAULT_STYLE_INDEX = STYLE_NAMES.index(DEFAULT_STYLE)
+
+# --- PRECOMPUTED STYLE TABLES ---
+
+# Prompt suffix and negative prompt of each style, in flat dictionaries.
+# Prompt helpers read these directly instead of digging into STYLE_PRESETS.
+# Example: STYLE_SUFFIXES["Anime"] -> ", anime style, manga, ..."
+STYLE_SUFFIXES = {name: preset.get("prompt_suffix", "") for name, preset in STYLE_PRESETS.items()}
+STYLE_DEFAULT_NEGATIVES = {name: preset.get("negative_prompt", "") for name, preset in STYLE_PRESETS.items()}
@@ -12,36 +12,114 @@
 import time  # For time operations (wait times, seed generation)
 import os  # For operating system operations (file paths)
 import sys  # For Python system operations (module paths)
+import threading  # For limiting how many requests run at the same time
+from concurrent.futures import ThreadPoolExecutor, as_completed  # For parallel requests
 
 # Add project root directory to Python's module search path
 # This allows us to import files from config and utils folders
 # __file__: Path of this file (hf_api_handler.py)
 # os.path.dirname(): Go up one folder
 # By calling twice, we go from utils -> ai-image-generator
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _project_root not in sys.path:  # Don't add it again if it's already there
+    sys.path.append(_project_root)
 
 # Import InferenceClient from Hugging Face's official Python library
 # InferenceClient: A class that provides easy access to Hugging Face models
 # We use this modern approach instead of the old requests.post() method
 from huggingface_hub import InferenceClient
 
+# Exception types for network problems (requests is used by huggingface_hub)
+from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout as RequestsTimeout
+
 # Get API key and model settings from our config file
 # All configuration is centralized in settings.py (Single Source of Truth)
 from config.settings import (
     HUGGINGFACE_API_KEY,
     DEFAULT_MODEL,
-    ALTERNATIVE_MODELS
+    ALTERNATIVE_MODELS,
+    MAX_RETRY_ATTEMPTS,
+    RETRY_BASE_DELAY,
+    MAX_CONCURRENT_REQUESTS
 )
 
 # Import our logging functions
 # This way all operations are written to both console and log file
-from utils.logger import log_info, log_error, log_debug, log_warning
+from utils.logger import log_info, log_error, log_warning
+
+
+# ============================================
+# REQUEST LIMIT
+# ============================================
+
+# A semaphore is a counter of free "slots".
+# Each API request takes a slot and gives it back when finished.
+# If all slots are taken, the next request waits until one is free.
+# This is shared by all threads (and all users of the app), so the number
+# of requests sent to Hugging Face at the same time stays limited.
+_request_slots = threading.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+
+# ============================================
+# ERROR CLASSIFICATION
+# ============================================
+
+# HTTP status codes where another model may still work:
+# 403 = gated/forbidden model (e.g. license not accepted for FLUX.1-dev)
+# 404/410 = this model is not available, 500/502/504 = server-side problem
+_NEXT_MODEL_STATUS_CODES = frozenset({403, 404, 410, 500, 502, 504})
+
+# Words to look for when the error has no HTTP status code
+_NEXT_MODEL_ERROR_WORDS = ("timeout", "timed out", "connection", "403", "500", "502", "504")
+
+
+def _should_try_next_model(error, error_lower):
+    """
+    Decides whether trying the next model makes sense after an error.
+
+    Errors caused by the request itself (e.g. invalid parameters) fail
+    the same way on every model, so trying the others only wastes time.
+    Network problems and model-specific server errors are worth a retry.
+
+    Parameters:
+    - error (Exception): The exception raised by the API call
+    - error_lower (str): Lower-case error message (computed once by caller)
+
+    Returns:
+    - True: Try the next model
+    - False: Stop and return the error
+    """
+
+    # Network problems: matched by exception type, no text search needed
+    # (TimeoutError also covers huggingface_hub's InferenceTimeoutError)
+    if isinstance(error, (TimeoutError, ConnectionError, RequestsTimeout, RequestsConnectionError)):
+        return True
+
+    # huggingface_hub raises ValueError when the model isn't offered by the provider
+    # That only concerns this model, another one may be supported
+    if isinstance(error, ValueError) and "not supported" in error_lower:
+        return True
+
+    # HTTP errors carry the response, so the status code can be checked directly
+    response = getattr(error, "response", None)
+    status_code = getattr(response, "status_code", None)
+    if status_code is not None:
+        return status_code in _NEXT_MODEL_STATUS_CODES
+
+    # No status code: fall back to looking at the message
+    return any(word in error_lower for word in _NEXT_MODEL_ERROR_WORDS)
 
 
 # ============================================
 # CREATE INFERENCE CLIENT
 # ============================================
 
+# The client created by get_client(), shared by all threads
+# Stays None until a client has been created successfully
+_client = None
+_client_lock = threading.Lock()
+
+
 def get_client():
     """
     Creates a Hugging Face InferenceClient.
@@ -51,29 +129,47 @@ def get_client():
     It authenticates with a token (API key).
     It offers ready-made methods like text_to_image(), text_to_speech().
 
+    Why create it only once?
+    The client keeps an HTTP session with open connections.
+    Creating it once and reusing it avoids a new connection (and TLS
+    handshake) for every image. The same client is shared by all
+    threads, which is safe for separate requests.
+    Only a successfully created client is remembered: after a failure,
+    the next call (e.g. "Re-test API") tries again.
+
     Returns:
     - Success: InferenceClient object
     - Failure: None
     """
 
+    global _client
+
+    # Already created: reuse it
+    if _client is not None:
+        return _client
+
     # API key check
     # We can't create client without a key
     if not HUGGINGFACE_API_KEY:
         log_error("API key not found!")
         return None
 
-    try:
-        # Create InferenceClient object
-        # token parameter: Our Hugging Face API key (starts with hf_)
-        # Our identity is verified with this token and API access is granted
-        client = InferenceClient(
-            token=HUGGINGFACE_API_KEY,
-        )
-        return client
-    except Exception as e:
-        # If any error occurs, log it and return None
-        log_error(f"Client creation error: {str(e)}")
-        return None
+    # The lock makes sure parallel threads don't create several clients
+    with _client_lock:
+        if _client is None:
+            try:
+                # Create InferenceClient object
+                # token parameter: Our Hugging Face API key (starts with hf_)
+                # Our identity is verified with this token and API access is granted
+                _client = InferenceClient(
+                    token=HUGGINGFACE_API_KEY,
+                )
+            except Exception as e:
+                # If any error occurs, log it and return None (not remembered)
+                log_error("Client creation error: %s", e)
+                return None
+
+    return _client
 
 
 # ============================================
@@ -114,10 +210,10 @@ def generate_image(
 
     # --- LOG OPERATION START ---
     # These logs appear in terminal and are written to log file
-    log_info(f"=== IMAGE GENERATION STARTED ===")
-    log_info(f"Prompt: {prompt[:50]}...")  # First 50 characters (not too long)
-    log_info(f"Model: {DEFAULT_MODEL}")
-    log_info(f"Size: {width}x{height}")
+    log_info("=== IMAGE GENERATION STARTED ===")
+    log_info("Prompt: %s...", prompt[:50])  # First 50 characters (not too long)
+    log_info("Model: %s", DEFAULT_MODEL)
+    log_info("Size: %sx%s", width, height)
 
     # --- CREATE CLIENT ---
     # Get the client object that will communicate with API
@@ -132,7 +228,7 @@ def generate_image(
 
     # Try each model in order
     for model in models_to_try:
-        log_info(f"Trying model: {model}")
+        log_info("Trying model: %s", model)
 
         try:
             # --- SEND API REQUEST ---
@@ -141,20 +237,22 @@ def generate_image(
             # text_to_image() method: Generates image from text description
             # This method is one of InferenceClient's ready-made methods
             # It handles all complex API calls for us
-            image = client.text_to_image(
-                prompt=prompt,  # Main text description
-                model=model,  # Model to use
-                negative_prompt=negative_prompt if negative_prompt else None,  # Unwanted elements
-                width=width,  # Image width
-                height=height,  # Image height
-                num_inference_steps=num_steps,  # Quality steps
-                guidance_scale=guidance_scale,  # Prompt adherence
-            )
+            # "with _request_slots" waits for a free slot (see REQUEST LIMIT)
+            with _request_slots:
+                image = client.text_to_image(
+                    prompt=prompt,  # Main text description
+                    model=model,  # Model to use
+                    negative_prompt=negative_prompt if negative_prompt else None,  # Unwanted elements
+                    width=width,  # Image width
+                    height=height,  # Image height
+                    num_inference_steps=num_steps,  # Quality steps
+                    guidance_scale=guidance_scale,  # Prompt adherence
+                )
 
             # --- SUCCESS ---
             # If we got here without errors, image has been generated
             log_info("✅ Image generated successfully!")
-            log_info(f"Image size: {image.size}")
+            log_info("Image size: %s", image.size)
 
             # Return as tuple: (success status, image, message)
             return (True, image, "Image generated successfully!")
@@ -163,31 +261,38 @@ def generate_image(
             # --- ERROR HANDLING ---
             # An error occurred during API call
             error_msg = str(e)
-            log_error(f"Model {model} error: {error_msg}")
+            error_lower = error_msg.lower()  # Lower-case once, used by all checks below
+            log_error("Model %s error: %s", model, error_msg)
 
             # Different actions based on error type
 
             # Model loading error (503)
             # Models on Hugging Face are not kept active continuously
             # Model may need to load on first request (cold start)
-            if "loading" in error_msg.lower() or "503" in error_msg:
+            if "loading" in error_lower or "503" in error_msg:
                 log_warning("Model is loading, waiting...")
                 return (False, None, f"Model is loading... Please wait 30 seconds and try again.")
 
             # Rate limit error (429)
             # Too many requests sent, need to wait a bit
-            if "429" in error_msg or "rate" in error_msg.lower():
+            if "429" in error_msg or "rate" in error_lower:
                 log_warning("Rate limit exceeded!")
                 return (False, None, "Too many requests! Wait 1 minute and try again.")
 
             # Authorization error (401)
             # API key is invalid or expired
-            if "401" in error_msg or "unauthorized" in error_msg.lower():
+            if "401" in error_msg or "unauthorized" in error_lower:
                 log_error("API key is invalid!")
                 return (False, None, "API key is invalid! Get a new token from Hugging Face.")
 
-            # Try next model for other errors
-            log_warning(f"Trying next model...")
+            # Errors caused by the request itself (e.g. invalid parameters)
+            # would fail on every model, so stop here instead of trying them all
+            if not _should_try_next_model(e, error_lower):
+                log_error("Error is not model-specific, not trying other models")
+                return (False, None, f"Could not generate image: {error_msg}")
+
+            # Network or model-specific server error: try next model
+            log_warning("Trying next model...")
             continue  # Go to next iteration of for loop
 
     # --- ALL MODELS FAILED ---
@@ -196,6 +301,47 @@ def generate_image(
     return (False, None, "Could not generate image. Please try again later.")
 
 
+# ============================================
+# GENERATE IMAGE WITH RETRY
+# ============================================
+
+def generate_image_with_retry(max_attempts=MAX_RETRY_ATTEMPTS, **kwargs):
+    """
+    Calls generate_image() and retries on transient errors.
+
+    Which Errors Are Transient?
+    "Model is loading" (503) and "Too many requests" (429) usually
+    go away after a short wait. Other errors (invalid key, etc.)
+    are returned immediately because retrying won't help.
+
+    Wait time doubles after each attempt (exponential backoff):
+    RETRY_BASE_DELAY, RETRY_BASE_DELAY * 2, RETRY_BASE_DELAY * 4...
+
+    Parameters:
+    - max_attempts (int): Maximum number of attempts
+    - **kwargs: Arguments passed to generate_image()
+
+    Returns:
+    - Same as generate_image(): (success, image, message)
+    """
+
+    for attempt in range(max_attempts):
+        success, image, message = generate_image(**kwargs)
+
+        # Success, or an error that won't go away by waiting
+        transient = "loading" in message.lower() or "too many requests" in message.lower()
+        if success or not transient:
+            return (success, image, message)
+
+        # Don't wait after the last attempt
+        if attempt < max_attempts - 1:
+            delay = RETRY_BASE_DELAY * (2 ** attempt)
+            log_warning("Transient error, retrying in %s seconds (%d/%d)...", delay, attempt + 1, max_attempts)
+            time.sleep(delay)
+
+    return (success, image, message)
+
+
 # ============================================
 # API CONNECTION TEST - REAL TEST
 # ============================================
@@ -233,22 +379,19 @@ def test_api_connection():
         return (False, "API key format is wrong! Should start with 'hf_'.")
 
     # --- CLIENT CREATION TEST ---
-    try:
-        # Try to create InferenceClient
-        # If this succeeds, API key is valid
-        client = InferenceClient(token=HUGGINGFACE_API_KEY)
-        log_info("✅ InferenceClient created")
+    # Uses the shared client, so it's ready for the first generation too
+    # get_client() logs the error itself and returns None on failure
+    client = get_client()
+    if client is None:
+        return (False, "API connection error: Could not create client.")
 
-        # Note: We're not making a real API call here
-        # We're only verifying that client can be created
-        # Real test will be done when image is generated
-        log_info("✅ API connection ready")
-        return (True, "API connection ready.")
+    log_info("✅ InferenceClient created")
 
-    except Exception as e:
-        # If client couldn't be created, return error
-        log_error(f"API connection error: {str(e)}")
-        return (False, f"API connection error: {str(e)}")
+    # Note: We're not making a real API call here
+    # We're only verifying that client can be created
+    # Real test will be done when image is generated
+    log_info("✅ API connection ready")
+    return (True, "API connection ready.")
 
 
 # ============================================
@@ -285,7 +428,7 @@ def generate_multiple_images(
     - (successful_images_list, error_messages_list)
     """
 
-    log_info(f"=== MULTIPLE IMAGE GENERATION: {count} images ===")
+    log_info("=== MULTIPLE IMAGE GENERATION: %d images ===", count)
 
     # We keep successful images and errors in separate lists
     successful_images = []  # [{"image": PIL.Image, "seed": 12345}, ...]
@@ -297,24 +440,40 @@ def generate_multiple_images(
     # Convert to integer with int()
     base_seed = int(time.time())
 
-    # Loop for each image
+    # --- SEND REQUESTS IN PARALLEL ---
+    # API calls mostly wait for the network, so running them in threads
+    # takes about as long as the slowest image instead of the sum of all.
+    # Rate limits (429) are handled by generate_image_with_retry(),
+    # which waits with exponential backoff instead of a fixed sleep.
+    results = {}  # {index: (success, image, message)}
+
+    # max(1, ...): ThreadPoolExecutor needs at least one worker (count may be 0)
+    with ThreadPoolExecutor(max_workers=max(1, min(count, MAX_CONCURRENT_REQUESTS))) as executor:
+        futures = {
+            executor.submit(
+                generate_image_with_retry,
+                prompt=prompt,
+                negative_prompt=negative_prompt,
+                width=width,
+                height=height,
+                num_steps=num_steps,
+                guidance_scale=guidance_scale,
+                # Different seed for each image: base + 0, base + 1, base + 2, ...
+                seed=base_seed + i
+            ): i
+            for i in range(count)
+        }
+
+        for future in as_completed(futures):
+            i = futures[future]
+            results[i] = future.result()
+            log_info("Image %d/%d finished", i + 1, count)
+
+    # Process results in original order
     for i in range(count):
-        # Different seed for each image: base + 0, base + 1, base + 2, ...
+        success, image, message = results[i]
         current_seed = base_seed + i
-        log_info(f"Generating image {i + 1}/{count}...")
-
-        # Generate single image
-        success, image, message = generate_image(
-            prompt=prompt,
-            negative_prompt=negative_prompt,
-            width=width,
-            height=height,
-            num_steps=num_steps,
-            guidance_scale=guidance_scale,
-            seed=current_seed
-        )
-
-        # Process result
+
         if success:
             # Add successful image to list
             # We store both image and seed (for metadata)
@@ -322,22 +481,14 @@ def generate_multiple_images(
                 "image": image,
                 "seed": current_seed
             })
-            log_info(f"✅ Image {i + 1} successful!")
+            log_info("✅ Image %d successful!", i + 1)
         else:
             # Save error message
             error_messages.append(f"Image {i + 1}: {message}")
-            log_warning(f"❌ Image {i + 1} failed: {message}")
-
-        # --- RATE LIMIT PROTECTION ---
-        # If not last image, wait a bit
-        # This is important to avoid hitting Hugging Face's rate limit
-        # If we send requests too fast, we might get 429 error
-        if i < count - 1:  # If not last image
-            log_debug("Waiting 3 seconds...")
-            time.sleep(3)  # Wait 3 seconds
+            log_warning("❌ Image %d failed: %s", i + 1, message)
 
     # --- RESULT ---
-    log_info(f"=== RESULT: {len(successful_images)} successful, {len(error_messages)} failed ===")
+    log_info("=== RESULT: %d successful, %d failed ===", len(successful_images), len(error_messages))
 
     # Return two lists: successful images and errors
     return (successful_images, error_messages)
@@ -4,28 +4,94 @@
 # Writes to both console and file.
 # ============================================
 
+import atexit  # For stopping the background log thread when the program exits
 import logging
+import logging.handlers  # QueueHandler / QueueListener
 import os
-from datetime import datetime
+import queue
+import sys
 
 # Create log folder
 LOG_FOLDER = "logs"
 if not os.path.exists(LOG_FOLDER):
     os.makedirs(LOG_FOLDER)
 
-# Log file name (new file each day)
-log_file = os.path.join(LOG_FOLDER, f"app_{datetime.now().strftime('%Y%m%d')}.log")
+# Log file name
+# The current day is always written to app.log; at midnight it is
+# renamed to app.log.YYYY-MM-DD and a new app.log is started
+log_file = os.path.join(LOG_FOLDER, "app.log")
 
 # Configure logger
 logger = logging.getLogger("AIImageGenerator")
 logger.setLevel(logging.DEBUG)  # Capture all levels
 
+# ============================================
+# BUFFERED CONSOLE OUTPUT
+# ============================================
+
+class _BufferedStreamHandler(logging.StreamHandler):
+    """
+    StreamHandler that does not flush after every record.
+
+    The normal StreamHandler calls flush() after each line, which is
+    one write system call per log message. This one only writes into
+    the stream's buffer; _BatchFlushQueueListener below flushes once
+    the queue is empty, so a burst of messages goes out in one write.
+    """
+
+    def emit(self, record):
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+class _BatchFlushQueueListener(logging.handlers.QueueListener):
+    """
+    QueueListener that flushes its handlers whenever the queue runs empty.
+    Messages still appear right away when logging is quiet, but many
+    messages in a row are written together.
+    """
+
+    def handle(self, record):
+        super().handle(record)
+        if self.queue.empty():
+            for handler in self.handlers:
+                handler.flush()
+
+
+def _open_console_stream():
+    """
+    Opens a block-buffered text stream on stderr.
+    sys.stderr itself is line-buffered (one write per line).
+    closefd=False: closing this stream never closes the real stderr.
+    Falls back to sys.stderr if it has no file descriptor.
+    """
+
+    # An explicit buffer size matters: with the default, Python turns on
+    # line buffering when stderr is a terminal (one write per line again)
+    try:
+        return open(sys.stderr.fileno(), "w", buffering=64 * 1024,
+                    encoding="utf-8", closefd=False)
+    except (AttributeError, OSError, ValueError):
+        return sys.stderr
+
+
 # Console handler (writes to terminal)
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.DEBUG)
+# INFO and above only: printing every DEBUG line to the terminal is slow
+console_handler = _BufferedStreamHandler(_open_console_stream())
+console_handler.setLevel(logging.INFO)
 
-# File handler (writes to file)
-file_handler = logging.FileHandler(log_file, encoding="utf-8")
+# File handler (writes to file, new file each day)
+# when="midnight": rotates on its own clock, so a program running past
+# midnight doesn't keep writing to yesterday's file
+# backupCount=14: keeps the last 14 days, older files are deleted
+# delay=True: the file is opened on the first write, not at import
+file_handler = logging.handlers.TimedRotatingFileHandler(
+    log_file, when="midnight", backupCount=14, encoding="utf-8", delay=True
+)
 file_handler.setLevel(logging.DEBUG)
 
 # Log format
@@ -37,19 +103,43 @@ log_format = logging.Formatter(
 console_handler.setFormatter(log_format)
 file_handler.setFormatter(log_format)
 
-# Add handlers
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+# --- BACKGROUND WRITING ---
+# log_info() etc. only put the record into a queue (very fast)
+# A QueueListener thread takes records from the queue and writes them
+# to the console and file, so callers never wait for disk I/O
+# The check prevents adding a second listener if this module is loaded again
+if not logger.handlers:
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    # respect_handler_level=True: each handler keeps its own level
+    log_listener = _BatchFlushQueueListener(
+        log_queue, console_handler, file_handler, respect_handler_level=True
+    )
+    log_listener.start()
+
+    # Write out everything left in the queue when the program exits
+    # atexit runs in reverse order: stop the listener first, then flush the console
+    atexit.register(console_handler.flush)
+    atexit.register(log_listener.stop)
 
 # Functions for ease of use
-def log_info(message):
-    logger.info(message)
+# Pass values as extra arguments instead of building the text first:
+#   log_info("Size: %dx%d", width, height)   instead of   log_info(f"Size: {width}x{height}")
+# The text is then only built if the message is actually written
+# isEnabledFor() skips the call completely when the level is turned off
+def log_info(message, *args):
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(message, *args)
 
-def log_error(message):
-    logger.error(message)
+def log_error(message, *args):
+    if logger.isEnabledFor(logging.ERROR):
+        logger.error(message, *args)
 
-def log_warning(message):
-    logger.warning(message)
+def log_warning(message, *args):
+    if logger.isEnabledFor(logging.WARNING):
+        logger.warning(message, *args)
 
-def log_debug(message):
-    logger.debug(message)
\ No newline at end of file
+def log_debug(message, *args):
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(message, *args)